@@ -45,8 +45,6 @@
 # - read text statuses on numeric quality assignments/tests
 #    so "QualityX := 3" => "QualityX := 3, [3's Status Description]"
 #    or even "Description" (think about SAY) [PARTIALLY DONE, can be smarter]
-# - Improve (or even completely deprecate) format_obj using better .format()
-#    specs and ideas from http://code.activestate.com/recipes/577227/
 # - Improve SaveQualities/SaveQuality: Better pretty/bare
 # - Take a look on _IGNORED/OPTIONAL_FIELDS, and parse more of them.
 # - Revamp Effect._format(), try to unify with Requirement _format() or _tokenize()
@@ -72,22 +70,40 @@
 import argparse
 import bisect
 import collections
+import concurrent.futures
 import enum
+import functools
+import itertools
 import json
 import logging
 import math
+import mmap
+import operator
 import os
+import pickle
 import random
 import re
+import string
 import sys
 import urllib.parse
 
+try:
+    # Optional, much faster parsing of the big data files
+    import orjson
+except ImportError:
+    orjson = None
+
 
 log = logging.getLogger(os.path.basename(os.path.splitext(__file__)[0]))
 
 # Changed by main() on command-line args
 TEST_INTEGRITY = False
 
+# Keep a pickled copy of each parsed data file next to it, re-used while the
+# data file is not modified. Opt-in, as it writes to the game data directory:
+# enabled only by SS_CACHE=1 in the environment, any other value disables it
+CACHE_DATA = os.environ.get('SS_CACHE') == '1'
+
 ENTITIES = {
     'autosave':  'autosave',
     'event':     'events',
@@ -101,11 +117,48 @@ ENTITIES = {
 ################################################################################
 # General helper functions
 
-def format_obj(fmt, obj, *args, **kwargs):
-    objdict = {_:getattr(obj, _) for _ in vars(obj) if not _.startswith('_')}
-    objdict.update(dict(str=str(obj), repr=repr(obj)))
-    objdict.update(kwargs)
-    return fmt.format(*args, **objdict)
+@functools.lru_cache(maxsize=None)
+def compile_format(fmt):
+    """Pre-parse a format string into a tuple of segments for format_compiled()
+
+    Each segment is a (literal, field, spec, conversion) tuple as returned by
+    string.Formatter.parse(). Results are cached, so it's cheap to call it
+    on every use of a template not known in advance.
+    """
+    return tuple(string.Formatter().parse(fmt))
+
+
+def format_compiled(segments, obj, **kwargs):
+    """Format an object using segments from compile_format()
+
+    Fields are looked up in kwargs, then as attributes of obj, so properties
+    and __slots__ are available. '{str}' and '{repr}' work too, and so does
+    attribute access such as '{quality.name}'
+    """
+    out = []
+    for literal, field, spec, conversion in segments:
+        out.append(literal)
+        if field is None:
+            continue
+        field, *attrs = field.split('.')
+        if field in kwargs:
+            value = kwargs[field]
+        elif field == 'str':
+            value = str(obj)
+        elif field == 'repr':
+            value = repr(obj)
+        else:
+            value = getattr(obj, field)
+        for attr in attrs:
+            value = getattr(value, attr)
+        if conversion == 'r':
+            value = repr(value)
+        elif conversion == 's':
+            value = str(value)
+        elif conversion == 'a':
+            value = ascii(value)
+        out.append(format(value, spec) if spec else str(value))
+    return "".join(out)
 
 
 def indent(text, level=1, pad='\t'):
@@ -132,6 +185,15 @@ def dice(num):
     return random.randint(1, int(num)) if num > 1 else 1  # needs int, num can be float
 
 
+# Sort keys and getters. attrgetter() is faster than the equivalent lambda
+_by_id      = operator.attrgetter('id')
+_by_name    = operator.attrgetter('name')
+_quality_of = operator.attrgetter('quality')
+
+# For removing 'Default' from Outcome labels
+_re_default = re.compile(' [Dd]efault')
+
+
 _re_safe_eval = re.compile(r'[ .0-9()*/+-]+')
 def safe_eval(expr):
     # Largest expression in game data is 63 chars before any substitution
@@ -153,7 +215,7 @@ def parse_advanced(text, parsers):
             key = '_'
         return str(parsers[key](key, value))
     while True:
-        result = re.sub(_re_advanced, parse, text)
+        result = _re_advanced.sub(parse, text)
         if result == text:
             break
         text = result
@@ -391,8 +453,11 @@ class Entity:
     """Base class for an Entity
         Subclasses MAY override or extend _REQUIRED_FIELDS, and MAY override
         _OPTIONAL_FIELDS and _IGNORED_FIELDS
+        Subclasses instantiated in large numbers SHOULD define __slots__
     """
 
+    __slots__ = ('_data', 'idx', 'ss', 'id', 'name', 'description', 'image')
+
     _ENTITY_FIELDS    = {"Id", "Name", "Description", "Image"}
     _ENTITY_REQUIRED  = {"Id"}
 
@@ -403,6 +468,18 @@ class Entity:
     _re_gamenote = re.compile('\[([^]]+)]"?$')
     _re_adv = re.compile('\[(?P<key>[a-z]+):(?P<value>(?:[^][]+|\[[^][]+])+)]')
 
+    _wikirow_fmt = compile_format(
+        "|-\n"
+        "| {idx}\n"
+        "| {id}\n"
+        "| [[{name_wiki}]]\n"
+        "| {{{{game icon|{image}}}}}\n"
+        "| {description_wiki}\n")
+    _wikipage_fmt = compile_format(
+        "=={name_wiki}==\n"
+        "* <nowiki>{repr}</nowiki>\n"
+        "* {wiki}\n")
+
 
     def __init__(self, data, idx=0, ss=None):
         self._data = data
@@ -479,7 +556,7 @@ class Entity:
 
     @property
     def gamenote(self):
-        match = re.search(self._re_gamenote, self.description)
+        match = self._re_gamenote.search(self.description)
         if match:
             return match.group(1)
         return ""
@@ -510,21 +587,10 @@ class Entity:
         return self.name_wiki or str(self.id)
 
     def wikirow(self):
-        return format_obj(
-            "|-\n"
-            "| {idx}\n"
-            "| {id}\n"
-            "| [[{name_wiki}]]\n"
-            "| {{{{game icon|{image}}}}}\n"
-            "| {description_wiki}\n",
-            self)
+        return format_compiled(self._wikirow_fmt, self)
 
     def wikipage(self):
-        return format_obj(
-            "=={name_wiki}==\n"
-            "* <nowiki>{repr}</nowiki>\n"
-            "* {wiki}\n",
-            self, wiki=self.wiki(), repr=repr(self))
+        return format_compiled(self._wikipage_fmt, self, wiki=self.wiki())
 
     def _pretty_text(self, text, cut=120, elipsis="(...)"):
         """Quotes and limits a text, replacing control characters"""
@@ -575,8 +641,8 @@ class Entity:
             # By ID, used in Requirements and Effects
             quality = self.ss.qualities.get(int(value))
             if quality:
-                return format_obj(qbfmt if key == 'qb' else qfmt,
-                                  quality, quality=quality)
+                return format_compiled(compile_format(qbfmt if key == 'qb' else qfmt),
+                                       quality, quality=quality)
             # Quality not found
             log.warning("Quality(%s) not found, referenced in %r: %s", value, self, text)
             return noqfmt.format(value)
@@ -661,6 +727,24 @@ class Quality(Entity):
     _IGNORED_FIELDS  = {'AllowedOn', 'CssClasses', 'Notes', 'Ordering', 'OwnerName', 'QEffectPriority',
                         'QualitiesPossessedList', 'VariableDescriptionText'}
 
+    # For scalar (atomic, non-mutable) values only!
+    _scalar_fields = (
+        # JSON key, lowercase is the attribute name
+        ("AvailableAt",                str,  ""),
+        ("Cap",                        int,  0),
+        ("Category",                   int,  0),
+        ("DifficultyScaler",           int,  0),
+        ("DifficultyTestType",         int,  0),
+        ("IsSlot",                     bool, False),
+        ("Nature",                     int,  0),
+        ("Persistent",                 bool, False),
+        ("PluralName",                 str,  ""),
+        ("PyramidNumberIncreaseLimit", int,  0),
+        ("Tag",                        str,  ""),
+        ("UsePyramidNumbers",          bool, False),
+        ("Visible",                    bool, False),
+    )
+
     _status_fields = (
         # Attribute name   JSON key                 Caption for .pretty()
         ('level_status',  'LevelDescriptionText',  'Journal Descriptions'),
@@ -668,35 +752,35 @@ class Quality(Entity):
         ('image_status',  'LevelImageText',        'Images'),
     )
 
+    # Attributes set from the tables above must be listed here too
+    __slots__ = (
+        tuple(_[0].lower() for _ in _scalar_fields) +
+        tuple(_[0] for _ in _status_fields) +
+        tuple('_' + _[0] for _ in _status_fields) +
+        ('_status_cache', '_usage', 'assign', 'enhancements', 'event')
+    )
+
 
     def __init__(self, data, idx=0, ss=None):
         super().__init__(data=data, idx=idx, ss=ss)
-        # For scalar (atomic, non-mutable) values only!
-        for attr, atype, default in (
-            ("AvailableAt",                str,  ""),
-            ("Cap",                        int,  0),
-            ("Category",                   int,  0),
-            ("DifficultyScaler",           int,  0),
-            ("DifficultyTestType",         int,  0),
-            ("IsSlot",                     bool, False),
-            ("Nature",                     int,  0),
-            ("Persistent",                 bool, False),
-            ("PluralName",                 str,  ""),
-            ("PyramidNumberIncreaseLimit", int,  0),
-            ("Tag",                        str,  ""),
-            ("UsePyramidNumbers",          bool, False),
-            ("Visible",                    bool, False),
-        ):
+        for attr, atype, default in self._scalar_fields:
             setattr(self, attr.lower(), atype(self._data.get(attr, default)))
 
         def _parse_status(value):
             if not value:
-                return {}
-            return {int(k):v for k,v in sorted(row.split("|")
-                                               for row in value.split("~"))}
+                return (), ()
+            pairs = sorted((int(k), v) for k, _, v in (row.partition("|")
+                                                       for row in value.split("~")))
+            return tuple(_[0] for _ in pairs), tuple(_[1] for _ in pairs)
 
+        # Public attributes are dicts, for convenience. status_for() uses the
+        # private (sorted keys, values) tuples, suitable for bisect
         for attr, key, _ in self._status_fields:
-            setattr(self, attr, _parse_status(self._data.get(key, "")))
+            keys, values = _parse_status(self._data.get(key, ""))
+            setattr(self, attr, dict(zip(keys, values)))
+            setattr(self, '_' + attr, (keys, values))
+        self._status_cache = {}  # Statuses never change, so status_for() is cached
+        self._usage = None       # Neither do events and shops, same for usage()
 
         # Both assign and enhancements referece other qualities that might not
         # have been loaded yet, as well as UseEvent.
@@ -778,20 +862,32 @@ class Quality(Entity):
 
 
     def status_for(self, value):
+        try:
+            return self._status_cache[value]
+        except KeyError:
+            status = self._status_cache[value] = self._status_for(value)
+            return status
+
+
+    def _status_for(self, value):
         # FIXME: add an option for bisect_right(), for tests on Min value (<=)
         # See https://docs.python.org/3/library/bisect.html and
         #     https://code.activestate.com/recipes/577197-sortedcollection/
-        def largest_lesser(d, v):
-            if not d:
-                return
-            keys = sorted(d.keys())
-            i = bisect.bisect_left(keys, v)
+        def exact(statuses, i):
+            keys, values = statuses
+            if i < len(keys) and keys[i] == value:
+                return values[i]
+
+        def largest_lesser(statuses, i):
             if i:
-                return d[keys[i-1]]
-        return (self.change_status.get(value) or
-                self.level_status.get(value) or
-                largest_lesser(self.change_status, value) or
-                largest_lesser(self.level_status, value)
+                return statuses[1][i-1]
+
+        ic = bisect.bisect_left(self._change_status[0], value)
+        il = bisect.bisect_left(self._level_status[0],  value)
+        return (exact(self._change_status, ic) or
+                exact(self._level_status, il) or
+                largest_lesser(self._change_status, ic) or
+                largest_lesser(self._level_status, il)
                 or "").rstrip('.') or ""
 
 
@@ -843,42 +939,36 @@ class Quality(Entity):
         if not formatting == 'pretty':
             log.info("You don't want pretty, but that's what you'll get")
 
-        qid = self.id
-        results = {}
+        # Only events and shops are used, never a save, so output can be cached
+        if self._usage is None:
+            self._usage = self._create_usage()
+        return self._usage
+
+
+    def _create_usage(self):
+        # Factories only run on a miss, unlike setdefault() default argument
+        def event_usage():
+            return dict(req=None, eff=None,
+                        act=collections.defaultdict(lambda: dict(req=None, out=[])))
+
+        events = collections.defaultdict(event_usage)
+        shops  = collections.defaultdict(list)
         output = []
-        for e in self.ss.events:
-            for r in e.requirements:
-                if r.quality.id == qid:
-                    results.setdefault(e,
-                        dict(req=None, eff=None, act={}))['req'] = r
-                    break
-
-            for f in e.effects:
-                if f.quality.id == qid:
-                    results.setdefault(e,
-                        dict(req=None, eff=None, act={}))['eff'] = f
-                    break
+        for e, kind, a, o, item in self.ss.quality_usage(self.id):
+            if kind == 'shop':
+                shops[e].append(item)
+                continue
 
-            for a in e.actions:
-                for r in a.requirements:
-                    if r.quality.id == qid:
-                        results.setdefault(e,
-                            dict(req=None, eff=None, act={}))['act'].setdefault(a,
-                                dict(req=None, out=[]))['req'] = r
-                        break
+            usage = events[e]
+            if kind in ('req', 'eff'):
+                usage[kind] = item
+                continue
 
-                for o in a.outcomes:
-                    for f in o.effects:
-                        if f.quality.id == qid:
-                            results.setdefault(e,
-                                dict(req=None, eff=None, act={}))['act'].setdefault(a,
-                                    dict(req=None, out=[]))['out'].append(o)
-                            break
-
-        for s in self.ss.shops:
-            for i in s.items:
-                if qid in (i.item.id, i.currency.id):
-                    results.setdefault(s, []).append(i)
+            usage = usage['act'][a]
+            if kind == 'act_req':
+                usage['req'] = item
+            else:
+                usage['out'].append(o)
 
         def _print(_e, _i=0):
             if not _e:  # No object (None) or blank line ("")
@@ -886,35 +976,31 @@ class Quality(Entity):
                     output.append("")
                 return
 
-            if e.etype == "Outcome":
-                out = e.pretty(short=True)
-            elif e.etype == "Event":
+            if _e.etype == "Outcome":
+                out = _e.pretty(short=True)
+            elif _e.etype == "Event":
                 out = "{} {}{}".format(
-                        e.etype.upper(), e,
-                        " [{}]".format(e.location)
-                            if e.location else "",
+                        _e.etype.upper(), _e,
+                        " [{}]".format(_e.location)
+                            if _e.location else "",
                 )
-            elif e.etype == "Shop":
+            elif _e.etype == "Shop":
                 out = "{} {}{}".format(
-                        e.etype.upper(), e,
-                        " [{}]".format(", ".join(str(_) for _ in e.locations))
-                            if e.locations else "",
+                        _e.etype.upper(), _e,
+                        " [{}]".format(", ".join(str(_) for _ in _e.locations))
+                            if _e.locations else "",
                 )
             else:
-                out = "{} {}".format(e.etype.upper(), e)
+                out = "{} {}".format(_e.etype.upper(), _e)
 
-            output.append(indent(out, i))
+            output.append(indent(out, _i))
 
 
-        for e, r in sorted(results.items()):
+        # Explicit keys, so Events and Shops with the same ID are never
+        # compared, and neither are their result dicts or lists
+        for e in sorted(events, key=_by_id):
+            r = events[e]
             _print(e)
-
-            if e.etype == "Shop":
-                for i in r:
-                    _print(i, 1)
-                _print("")
-                continue
-
             _print(r['req'], 1)
             _print(r['eff'], 1)
             for a in r['act']:
@@ -925,6 +1011,12 @@ class Quality(Entity):
                 _print("")
             # _print("")
 
+        for s in sorted(shops, key=_by_id):
+            _print(s)
+            for i in shops[s]:
+                _print(i, 1)
+            _print("")
+
         return "\n".join(output).strip()
 
 
@@ -937,6 +1029,8 @@ class Location(Entity):
     _REQUIRED_FIELDS = {'Name'}
     _OPTIONAL_FIELDS = {'Description', 'ImageName', 'MoveMessage'}
 
+    __slots__ = ('message', 'setting')
+
 
     def __init__(self, data, idx=0, ss=None):
         super().__init__(data=data, idx=idx, ss=ss)
@@ -957,12 +1051,26 @@ class ShopItem(Entity):
     _OPTIONAL_FIELDS = {"Cost", "SellPrice"}
     _IGNORED_FIELDS  = {"BuyMessage", "SellMessage"}  # only dummies
 
+    __slots__ = ('shop', 'item', 'currency', 'buy', 'sell')
+
 
     def __init__(self, data, idx=0, ss=None, shop=None):
         super().__init__(data=data, idx=idx, ss=ss)
+        qualities = ss.qualities
+
+        def quality(key):
+            qid = self._data[key]['Id']
+            q = qualities.get(qid)
+            if q is None:
+                # Create a dummy one, so pretty() and usage() still work
+                q = Quality(data={'Id': qid, 'Name':''}, ss=ss)
+                log.warning("Could not find Quality for %r in %r: %d",
+                            key, shop, qid)
+            return q
+
         self.shop     = shop
-        self.item     = ss.qualities.get(self._data['Quality']['Id'])
-        self.currency = ss.qualities.get(self._data['PurchaseQuality']['Id'])
+        self.item     = quality('Quality')
+        self.currency = quality('PurchaseQuality')
         self.buy      = self._data.get('Cost', 0)
         self.sell     = self._data.get('SellPrice', 0)
 
@@ -994,13 +1102,13 @@ class Shop(Entity):
         'QualitiesRequired',
     }
 
+    __slots__ = ('locations', '_items')
+
 
     def __init__(self, data, idx=0, ss=None, locations=None):
         super().__init__(data=data, idx=idx, ss=ss)
         self.locations = locations
-        self.items = [ShopItem(data=_d, idx=_i, ss=self.ss, shop=self)
-                      for _i, _d in
-                      enumerate(self._data['Availabilities'], 1)]
+        self._items = None
 
         # Integrity checks
         if not TEST_INTEGRITY:
@@ -1010,14 +1118,28 @@ class Shop(Entity):
             log.warning("%r have non-empty 'QualitiesRequired' list: %s", self,
                         self._data['QualitiesRequired'])
 
+        # Create items now, so they're checked too
+        self.items  # @NoEffect
+
+
+    @property
+    def items(self):
+        # Lazy, as many commands never need shop items
+        if self._items is None:
+            self._items = [ShopItem(data=_d, idx=_i, ss=self.ss, shop=self)
+                           for _i, _d in
+                           enumerate(self._data['Availabilities'], 1)]
+        return self._items
+
 
     def pretty(self, short=False):
-        pretty = super().pretty()
-        locations = (
-            "\n\tLocation: {}".format(", ".join(str(_) for _ in self.locations))
-        ) if self.locations else ""
-        items = "\n\t\t".join(_.pretty() for _ in self.items)
-        return "{}{}\n\tItems: {}\n\t\t{}".format(pretty, locations, len(self.items), items)
+        parts = [super().pretty()]
+        if self.locations:
+            parts.append("\n\tLocation: ")
+            parts.append(", ".join(str(_) for _ in self.locations))
+        parts.append("\n\tItems: {:d}\n\t\t".format(len(self.items)))
+        parts.append("\n\t\t".join(_.pretty() for _ in self.items))
+        return "".join(parts)
 
 
 
@@ -1039,7 +1161,10 @@ class QualityOperator(Entity):
         'ForceEquip',
     }
 
-    _reverse = (r'Terror$', r'Hunger$', r'Menaces:')
+    # Qualities where an increase is bad, matched at the start of the name
+    _re_reverse = re.compile(r'(?:Terror|Hunger)$|Menaces:')
+
+    __slots__ = ('parent', 'quality', 'operator')
 
 
     def __init__(self, data, idx=0, parent=None, ss=None):
@@ -1120,10 +1245,19 @@ class Effect(QualityOperator):
     )
     _OPTIONAL_FIELDS = QualityOperator._OPTIONAL_FIELDS | set(_OPS)
 
+    # Leading zeroes in ChangeByAdvanced, as in "0-[q:123]"
+    _re_zeroes = re.compile(r"^[+-]?0+([+-])")
+
+    __slots__ = ('_apply_ops',)
+
 
     def __init__(self, data, idx=0, parent=None, ss=None):
         super().__init__(data=data, idx=idx, parent=parent, ss=ss)
 
+        # (op, value) pairs in the order apply() evaluates them
+        self._apply_ops = tuple((_, self.operator[_]) for _ in reversed(self._OPS)
+                                if _ in self.operator)
+
         # Integrity check
         if TEST_INTEGRITY:
             ops = set(self.operator) - {'OnlyIfAtLeast', 'OnlyIfNoMoreThan'}
@@ -1136,10 +1270,7 @@ class Effect(QualityOperator):
         if save is None:
             save = self.ss.autosave
         squality = self.quality.fetch_from_save(save=save, add=True)
-        for op in reversed(self._OPS):
-            if op not in self.operator:
-                continue
-            value = self.operator[op]
+        for op, value in self._apply_ops:
             if 'Advanced' in op:
                 evaluated = self._eval_adv(value, save=save)
 
@@ -1230,7 +1361,7 @@ class Effect(QualityOperator):
 
             elif op == 'ChangeByAdvanced':
                 useqty = True
-                val = re.sub(r"^[+-]?0+([+-])", "\g<1>", value)
+                val = self._re_zeroes.sub(r"\g<1>", value)
                 if val[:1] not in "+-":
                     val = lvladvfmt.format(val)
 
@@ -1243,18 +1374,18 @@ class Effect(QualityOperator):
                 add(elsefmt, value, adv='Advanced' in op, op=op)
 
         if useqty:
-            if any(re.match(_, self.quality.name) for _ in self._reverse):
+            if self._re_reverse.match(self.quality.name):
                 qfmt = qfmtrev
             else:
                 qfmt = qfmtqty
 
-        return format_obj(qfmt,
-                          self.quality,
-                          sep=iif(posopstrs, sep),
-                          ifsep=iif(ifopstrs, ifsep),
-                          ifs=opsep.join(ifopstrs),
-                          ops=opsep.join(posopstrs),
-                          qtyops=qtyopsep.join(qtyopstrs),
+        return format_compiled(compile_format(qfmt),
+                               self.quality,
+                               sep=iif(posopstrs, sep),
+                               ifsep=iif(ifopstrs, ifsep),
+                               ifs=opsep.join(ifopstrs),
+                               ops=opsep.join(posopstrs),
+                               qtyops=qtyopsep.join(qtyopstrs),
         )
 
 
@@ -1282,15 +1413,41 @@ class Requirement(QualityOperator):
         'INVALID',
     ))
 
+    # Default formats for _format(), suitable for __str__() and pretty()
+    _formats = {
+        'prefix':         "{quality}",
+        'sep':            " ",
+        _Op.EQUAL:        "= {}",
+        _Op.MIN:          "≥ {}",
+        _Op.MAX:          "≤ {}",
+        _Op.RANGE:        "= {v1} to {v2}",
+        _Op.CHALLENGE:    "challenge ({} for 100%)",
+        _Op.CHALLENGEADV: "challenge ((100/{scaler}) * ({}) for 100%)",
+        _Op.LUCK:         "challenge ({}% chance)",
+        _Op.INVALID:      "{op} = {}",
+        'opsep':          " and ",
+        'status':         "{} [{status}]",
+        'advanced:q':     "[{quality}]",
+        'advanced:qb':    "[Base {quality}]",
+        'advanced:d':     "[1 to {}]",
+    }
+
+    __slots__ = ('_tokens', '_check_ops')
+
+    def __init__(self, data, idx=0, parent=None, ss=None):
+        super().__init__(data=data, idx=idx, parent=parent, ss=ss)
+        self._tokens = None  # Lazily set by _tokenize()
+
+        # (op, value) pairs in the order check() evaluates them
+        self._check_ops = tuple((_, self.operator[_]) for _ in reversed(self._OPS)
+                                if _ in self.operator)
+
 
     def check(self, save=None):
         if save is None:
             save = self.ss.autosave
         squality = self.quality.fetch_from_save(save=save)
-        for op in reversed(self._OPS):
-            if op not in self.operator:
-                continue
-            value = self.operator[op]
+        for op, value in self._check_ops:
             if 'Advanced' in op:
                 value = self._eval_adv(value, save=save)
 
@@ -1318,6 +1475,14 @@ class Requirement(QualityOperator):
 
 
     def _tokenize(self):
+        # Operators never change after __init__(), so tokens are cached.
+        # Callers must not change them, not even the kwargs dict.
+        if self._tokens is None:
+            self._tokens = tuple(self._create_tokens())
+        return self._tokens
+
+
+    def _create_tokens(self):
         # Create a copy of operators, filtering out irrelevant ones
         ops = self.operator.copy()
         tokens = []
@@ -1375,24 +1540,8 @@ class Requirement(QualityOperator):
 
 
     def _format(self, formats=None, showstatus=True, forceprefix=True):
-        fmts = {
-            'prefix':              "{quality}",
-            'sep':                 " ",
-            self._Op.EQUAL:        "= {}",
-            self._Op.MIN:          "≥ {}",
-            self._Op.MAX:          "≤ {}",
-            self._Op.RANGE:        "= {v1} to {v2}",
-            self._Op.CHALLENGE:    "challenge ({} for 100%)",
-            self._Op.CHALLENGEADV: "challenge ((100/{scaler}) * ({}) for 100%)",
-            self._Op.LUCK:         "challenge ({}% chance)",
-            self._Op.INVALID:      "{op} = {}",
-            'opsep':               " and ",
-            'status':              "{} [{status}]",
-            'advanced:q':          "[{quality}]",
-            'advanced:qb':         "[Base {quality}]",
-            'advanced:d':          "[1 to {}]",
-        }
-        fmts.update(formats or {})
+        # Class formats are shared: never change fmts in place!
+        fmts = {**self._formats, **formats} if formats else self._formats
         tokens = self._tokenize()
         prefix = forceprefix or not any(_[3] for _ in tokens)  # 3 = challenge
         statusops = (
@@ -1425,7 +1574,7 @@ class Requirement(QualityOperator):
                 args = tuple(add_status(_) for _ in args)
                 kwargs = {_: add_status(kwargs[_]) for _ in kwargs}
 
-            kwargs.update({'op': op, 'quality': self.quality})
+            kwargs = dict(kwargs, op=op, quality=self.quality)
             opstrs.append(fmts[optype].format(value, *args, **kwargs))
 
         return "{prefix}{sep}{ops}".format(
@@ -1456,6 +1605,8 @@ class BaseEvent(Entity):
         Subclasses SHOULD override or extend _OPTIONAL_FIELDS
     """
 
+    __slots__ = ('parent', '_gamenote')
+
     _OPTIONAL_FIELDS = {"Name", "Description", "Image"}
 
     _qualop_types = dict(
@@ -1470,6 +1621,8 @@ class BaseEvent(Entity):
         # Only Actions and Outcomes
         self.parent = parent
 
+        self._gamenote = None
+
         # Integrity checks
         if not TEST_INTEGRITY:
             return
@@ -1513,18 +1666,28 @@ class BaseEvent(Entity):
         # A single challenge fail: FAILURE
         # All challenges successful: SUCCESS
         # No challenge: DEFAULT
+        # Even after a FAILURE, all requirements must be checked for a LOCKED
+        failure, success = CheckResult.FAILURE, CheckResult.SUCCESS
         output = CheckResult.DEFAULT
         for requirement in self.requirements:
             result = requirement.check(save=save)
             if not result:
                 return CheckResult.LOCKED
-            elif result == CheckResult.FAILURE:
-                output = CheckResult.FAILURE
-            elif result == CheckResult.SUCCESS and not output == CheckResult.FAILURE:
-                output = CheckResult.SUCCESS
+            elif result == failure:
+                output = failure
+            elif result == success and not output == failure:
+                output = success
         return output
 
 
+    @property
+    def gamenote(self):
+        # Cached, read by both wikirow() and description_wiki of each export
+        if self._gamenote is None:
+            self._gamenote = super().gamenote
+        return self._gamenote
+
+
     def pretty(self, location=None, short=False):
         pretty = super(BaseEvent, self).pretty(short=short)
 
@@ -1560,16 +1723,28 @@ class BaseEvent(Entity):
 
     def _create_qualops(self, attr):
         key, cls = self._qualop_types[attr]
-        iids = []  # needed just for the integrity check
-        for i, item in enumerate(self._data[key], 1):
-            if TEST_INTEGRITY:
+        items = self._data[key]
+        if TEST_INTEGRITY:
+            # Separate pass, so the usual case pays nothing for it
+            iids = set()
+            for item in items:
                 iid = item['AssociatedQuality']['Id']
                 if iid in iids:
                     log.error('Duplicate quality %d in %s for %r',
                               iid, attr, self)
                 else:
-                    iids.append(iid)
-            yield cls(data=item, idx=i, parent=self, ss=self.ss)
+                    iids.add(iid)
+        return [cls(data=item, idx=i, parent=self, ss=self.ss)
+                for i, item in enumerate(items, 1)]
+
+
+    @staticmethod
+    def _by_quality(qualops):
+        """Map quality ID to the list of Requirements or Effects using it"""
+        index = {}
+        for qualop in qualops:
+            index.setdefault(qualop.quality.id, []).append(qualop)
+        return index
 
 
 
@@ -1581,6 +1756,9 @@ class Event(BaseEvent):
     _IGNORED_FIELDS  = {'CanGoBack', 'ChallengeLevel', 'Deck', 'Distribution', 'ExoticEffects', 'Ordering', 'Setting',
                         'Stickiness', 'Transient', 'Urgency'}
 
+    __slots__ = ('autofire', 'category', 'location', 'requirements', 'effects',
+                 'actions', '_req_by_qid', '_eff_by_qid')
+
 
     def __init__(self, data, idx=0, ss=None):
         super().__init__(data=data, idx=idx, ss=ss)
@@ -1598,8 +1776,10 @@ class Event(BaseEvent):
                 log.warning("Could not find Location for %r: %d", self, iid)
                 self.location = Location(self._data['LimitedToArea'])
 
-        self.requirements = list(self._create_qualops('requirements'))
-        self.effects      = list(self._create_qualops('effects'))
+        self.requirements = self._create_qualops('requirements')
+        self.effects      = self._create_qualops('effects')
+        self._req_by_qid  = self._by_quality(self.requirements)
+        self._eff_by_qid  = self._by_quality(self.effects)
 
         self.actions = []
         for i, item in enumerate(self._data.get('ChildBranches', []), 1):
@@ -1616,14 +1796,21 @@ class Event(BaseEvent):
 
 
     def pretty(self, location=None, short=False):
-        out = [super().pretty(location=self.location, short=short).strip(),
-               indent(self._pretty_qualops('effects', short=short))]
+        parts = [super().pretty(location=self.location, short=short).strip()]
+
+        effects = indent(self._pretty_qualops('effects', short=short))
+        if effects:
+            parts.append(effects)
 
         if self.actions:
-            out.append("\tActions: {:d}".format(len(self.actions)))
-            out.append("\n\n".join(indent(_.pretty(), 2) for _ in self.actions))
+            parts.append("\tActions: {:d}".format(len(self.actions)))
+            for action in self.actions:
+                parts.append(indent(action.pretty(), 2))
+                parts.append("")  # Blank line between actions
+            parts.pop()
 
-        return "\n".join(filter(None, out)) + '\n'
+        parts.append("")  # Trailing '\n'
+        return "\n".join(parts)
 
 
     def wikipage(self):
@@ -1664,7 +1851,7 @@ class Event(BaseEvent):
             "'''{}''' automatically causes the following effects:"
             ).format(self) + "".join(
             '\n* {}'
-            .format(_.wiki()) for _ in self.requirements
+            .format(_.wiki()) for _ in self.effects
         ) if self.effects else ""
 
         # Percentages don't add up to 100%, but consistent rest of the with wiki
@@ -1691,28 +1878,44 @@ class Event(BaseEvent):
 
 
     def wiki_linkicons(self):
-        for entity in sorted(self._related(), key=lambda _: _.name):
+        for entity in sorted(self._related(), key=_by_name):
             yield '\n'.join(
                 ("{e.name}",
                  "https://sunlesssea.gamepedia.com/{e.image_wiki_title}?action=edit",
                  "#REDIRECT [[{e.image_wiki_file}]]")).format(e=entity)
 
 
-    def _related(self):
+    def _related(self, deep=False):
         """Set of all entities related to the Event
 
         Qualitites in all effects and requirements,
         including actions and its outcomes,
         and also Events and Locations from such outcomes
+
+        If deep, also include the entities related to such triggered Events,
+        recursively. Each Event is visited only once, so shared and circular
+        triggers are not traversed again.
         """
-        entities = {self}
-        qualityiters = [self.requirements, self.effects]
-        for action in self.actions:
-            qualityiters.append(action.requirements)
-            for outcome in action.outcomes:
-                qualityiters.append(outcome.effects)
-                entities.update(_ for _ in (outcome.trigger, outcome.movetoarea) if _)
-        entities.update(__.quality for _ in qualityiters for __ in _)
+        entities = set()
+        qualityiters = []
+        events = [self]
+        seen = set()
+        while events:
+            event = events.pop()
+            if event.id in seen:
+                continue
+            seen.add(event.id)
+            entities.add(event)
+            qualityiters.extend((event.requirements, event.effects))
+            for action in event.actions:
+                qualityiters.append(action.requirements)
+                for outcome in action.outcomes:
+                    qualityiters.append(outcome.effects)
+                    entities.update(_ for _ in (outcome.trigger, outcome.movetoarea) if _)
+                    if deep and outcome.trigger:
+                        events.append(outcome.trigger)
+        entities.update(map(_quality_of,
+                            itertools.chain.from_iterable(qualityiters)))
         return entities
 
 
@@ -1737,28 +1940,50 @@ class Action(BaseEvent):
                                ("Success", "Successful"))
     _outcome_label_failed   = (("Default", "Failed"),)
 
+    __slots__ = ('requirements', 'canfail', 'outcomes', '_req_by_qid',
+                 '_outdict', '_result_outcomes', '_description_wiki')
+
 
     def __init__(self, data, idx=0, parent=None, ss=None):
         super().__init__(data=data, idx=idx, parent=parent, ss=ss)
 
-        self.requirements = list(self._create_qualops('requirements'))
+        self._description_wiki = None
+        self.requirements = self._create_qualops('requirements')
         self.canfail      = 'SuccessEvent' in self._data
+        self._req_by_qid  = self._by_quality(self.requirements)
 
         self.outcomes = []
         self._outdict = {}
-        for i, item in enumerate((_ for _ in self._OUTCOME_TYPES
-                                  if _ in self._data), 1):
-            outcome = Outcome(
-                 data      = self._data[item],
+        data, outcome_cls = self._data, Outcome
+        otypes = [_ for _ in self._OUTCOME_TYPES if _ in data]
+        for i, item in enumerate(otypes, 1):
+            outcome = outcome_cls(
+                 data      = data[item],
                  idx       = i,
                  parent    = self,
                  ss        = self.ss,
                  otype     = item,
-                 chance    = self._data.get(item + 'Chance', None),
-                 label     = self._outcome_label(item))
+                 chance    = data.get(item + 'Chance', None),
+                 label     = self._outcome_label(item, self.canfail))
             self.outcomes.append(outcome)
             self._outdict[item] = outcome
 
+        # Check result => (outcome, rare outcome or None, rare chance 0 to 1),
+        # for .do(). Chances are integer percentages, so random.random() < chance
+        # has the same odds as check_random()
+        def result_outcomes(otype):
+            rare = self._outdict.get('Rare' + otype)
+            return (self._outdict[otype], rare,
+                    (rare.chance or 0) / 100 if rare else 0)
+
+        self._result_outcomes = {
+            result: result_outcomes(otype)
+            for result, otype in ((CheckResult.DEFAULT, 'DefaultEvent'),
+                                  (CheckResult.FAILURE, 'DefaultEvent'),
+                                  (CheckResult.SUCCESS, 'SuccessEvent'))
+            if otype in self._outdict
+        }
+
         # Integrity checks
         if not TEST_INTEGRITY:
             return
@@ -1770,7 +1995,11 @@ class Action(BaseEvent):
 
     @property
     def description_wiki(self):
-        return re.sub(self._re_gamenote, "", super().description_wiki).strip()
+        # Cached, as descriptions never change. No cached_property with __slots__
+        if self._description_wiki is None:
+            self._description_wiki = self._re_gamenote.sub(
+                "", super().description_wiki).strip()
+        return self._description_wiki
 
     @property
     def quality_bought(self):
@@ -1793,7 +2022,7 @@ class Action(BaseEvent):
             return
         price = 0
         quality = None
-        echo = self.ss.qualities.fetch('Echo')
+        echo = self.ss.echo
         # Effects check:
         # Both quality and echo must have a single 'Level' operator
         # Quality effect is increment by 1, Echo effect is decrement by price
@@ -1831,7 +2060,7 @@ class Action(BaseEvent):
         # Structure check
         if not len(self.requirements) == 1:
             return
-        echo = self.ss.qualities.fetch('Echo')
+        echo = self.ss.echo
         requirement = self.requirements[0]
         quality = requirement.quality
         # Requirement check
@@ -1873,14 +2102,11 @@ class Action(BaseEvent):
             else:
                 showlog = True
                 resfunc = lambda _: _  # No-op
-            # Get default outcome
-            otype = "{}Event".format(result.title())
-            outcome = self._outdict[otype]
-            # Check for rare outcome, if any
-            rare = self._outdict.get('Rare{}'.format(otype))
+            # Get default outcome and rare outcome, if any
+            outcome, rare, chance = self._result_outcomes[result]
             # Choose outcome
             if rare:
-                if check_random(rare.chance):
+                if random.random() < chance:
                     # Rare
                     outcome = rare
                     result = rare.type.replace("Event", "")
@@ -1893,7 +2119,7 @@ class Action(BaseEvent):
                 pass
             result = resfunc(result)
             if showlog:
-                log.debug("%r: %s", self, re.sub(" [Dd]efault", "", str(outcome)))
+                log.debug("%r: %s", self, _re_default.sub("", str(outcome)))
                 # log.debug("%s outcome in %r: %r", loglabel.title(), self, outcome)
             # Apply outcome effects
             outcome.apply(save=save)
@@ -1914,30 +2140,15 @@ class Action(BaseEvent):
         outcomes = len(self.outcomes)
         rows = 2 * outcomes - (0 if self.canfail else 1)
         rowspan = iif(rows > 1, '| rowspan="{}"{}'.format(rows, ' ' * 14))
-        note = self.gamenote  # save to avoid multiple calls to property
-
-        def innerheader(_outcome):
-            return ("| {{{{style inner header{rare} "
-                    "| {label} event{chance}\n"
-            ).format(
-                label  = re.sub(" [Dd]efault", "", _outcome.label),
-                rare   = iif("Rare" in _outcome.label, "|*}}", "}}  "),  # lame
-                chance = iif(_outcome.chance, " ({}% chance)".format(_outcome.chance)),
-            )
-
-        def innercell(_outcome):
-            return "|{}{}{}\n".format(
-                iif(_outcome.idx < outcomes, " {{style inner cell}}     |"),
-                iif(_outcome.name, " ", "\n"),
-                _outcome.wiki(),
-            )
+        note = self.gamenote
+        innerheader, innercell = self._wiki_innerheader, self._wiki_innercell
 
         outcome = self.outcomes[0]
         if self.canfail:
-            firstrow  = innerheader(self.outcomes[0])
-            secondrow = "|-\n{}".format(innercell(outcome))
+            firstrow  = innerheader(outcome)
+            secondrow = "|-\n{}".format(innercell(outcome, outcomes))
         else:
-            firstrow = innercell(self.outcomes[0])
+            firstrow = innercell(outcome, outcomes)
             secondrow = ""
 
         page = (
@@ -1962,16 +2173,40 @@ class Action(BaseEvent):
 
         for outcome in self.outcomes[1:]:
             page += "|-\n{}|-\n{}".format(innerheader(outcome),
-                                          innercell(outcome))
+                                          innercell(outcome, outcomes))
 
         return page
 
 
-    def _outcome_label(self, otype):
+    @staticmethod
+    def _wiki_innerheader(outcome):
+        return ("| {{{{style inner header{rare} "
+                "| {label} event{chance}\n"
+        ).format(
+            label  = _re_default.sub("", outcome.label),
+            rare   = iif("Rare" in outcome.label, "|*}}", "}}  "),  # lame
+            chance = iif(outcome.chance, " ({}% chance)".format(outcome.chance)),
+        )
+
+
+    @staticmethod
+    def _wiki_innercell(outcome, outcomes):
+        """outcomes is the number of outcomes in the action"""
+        return "|{}{}{}\n".format(
+            iif(outcome.idx < outcomes, " {{style inner cell}}     |"),
+            iif(outcome.name, " ", "\n"),
+            outcome.wiki(),
+        )
+
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _outcome_label(cls, otype, canfail=False):
+        # Only a handful of (otype, canfail) combinations, so labels are cached
         label = otype
-        for sfrom, sto in (self._outcome_label_replaces +
-                           (self._outcome_label_failed
-                            if self.canfail
+        for sfrom, sto in (cls._outcome_label_replaces +
+                           (cls._outcome_label_failed
+                            if canfail
                             else ())):
             label = label.replace(sfrom, sto)
         return label.capitalize()
@@ -1983,28 +2218,39 @@ class Outcome(BaseEvent):
     _OPTIONAL_FIELDS = BaseEvent._OPTIONAL_FIELDS - {'Image'} | {'ExoticEffects', 'LinkToEvent', 'MoveToArea'}
     _IGNORED_FIELDS  = {'Category', 'ChildBranches', 'SwitchToSetting', 'SwitchToSettingId', 'Urgency'}
 
+    __slots__ = ('type', 'chance', 'label', 'trigger', 'effects', 'exoticeffects',
+                 'movetoarea', '_eff_by_qid', '_description_wiki')
+
 
     def __init__(self, data, idx=0, parent=None, ss=None,
                  otype=None, chance=None, label=None):
         super().__init__(data=data, idx=idx, parent=parent, ss=ss)
 
+        self._description_wiki = None
+
         self.type    = otype
         self.chance  = chance
         self.label   = label
-        self.trigger = self._data.get('LinkToEvent', {}).get('Id', None)
-        self.effects = list(self._create_qualops('effects'))
+        trigger = self._data.get('LinkToEvent')
+        self.trigger = trigger.get('Id') if trigger else None
+        self.effects = self._create_qualops('effects')
+        self._eff_by_qid = self._by_quality(self.effects)
 
         self.exoticeffects = self._data.get('ExoticEffects', "")
 
+        # Resolved eagerly, not on first access, as missing Locations are
+        # added to ss.locations, so they must be there right after loading
         self.movetoarea = None
-        if 'MoveToArea' in self._data:
-            eid = self._data['MoveToArea']['Id']
-            if self.ss and self.ss.locations:
-                self.movetoarea = ss.locations.get(eid)
+        area = self._data.get('MoveToArea')
+        if area:
+            eid = area['Id']
+            if self.ss:
+                # A plain dict lookup, no need to test for an empty container
+                self.movetoarea = self.ss.locations.get(eid)
 
             if not self.movetoarea:
                 log.warning("Could not find Location referenced in %r: %d", self, eid)
-                self.movetoarea = Location(self._data['MoveToArea'])
+                self.movetoarea = Location(area)
                 if self.ss:
                     self.ss.locations.add(self.movetoarea)
 
@@ -2023,39 +2269,46 @@ class Outcome(BaseEvent):
 
     @property
     def description_wiki(self):
-        note = self.gamenote
-        if note:
-            return "{}\n\n{{{{game note|{}}}}}".format(
-                re.sub(self._re_gamenote, "", super().description_wiki).strip(),
-                note)
-        return super().description_wiki
+        # Cached, as descriptions never change. No cached_property with __slots__
+        if self._description_wiki is None:
+            note = self.gamenote
+            if note:
+                self._description_wiki = "{}\n\n{{{{game note|{}}}}}".format(
+                    self._re_gamenote.sub("", super().description_wiki).strip(),
+                    note)
+            else:
+                self._description_wiki = super().description_wiki
+        return self._description_wiki
 
 
     apply = BaseEvent._apply
 
 
     def pretty(self, short=False):
-        out = ["{} outcome{}:".format(self.label,
+        parts = ["{} outcome{}:".format(self.label,
             iif(self.chance, " ({}% chance)".format(self.chance)))
         ]
 
         if not short:
-            out.append(indent(super(Outcome, self).pretty(short=False)))
+            parts.append(indent(super(Outcome, self).pretty(short=False)))
 
-        out.append(indent(self._pretty_qualops('effects', short=short)))
+        effects = indent(self._pretty_qualops('effects', short=short))
+        if effects:
+            parts.append(effects)
 
         if self.trigger:
-            out.append("\tTrigger event: {} - {}".format(self.trigger.id,
-                                                         self.trigger.name))
+            parts.append("\tTrigger event: {} - {}".format(self.trigger.id,
+                                                           self.trigger.name))
 
         if self.movetoarea:
-            out.append("\tMove to: {} - {}".format(self.movetoarea.id,
-                                                  self.movetoarea.name))
+            parts.append("\tMove to: {} - {}".format(self.movetoarea.id,
+                                                    self.movetoarea.name))
 
         if self.exoticeffects:
-            out.append("\t{}".format(self.exoticeffects))
+            parts.append("\t{}".format(self.exoticeffects))
 
-        return "\n".join(filter(None, out)) + '\n'
+        parts.append("")  # Trailing '\n'
+        return "\n".join(parts)
 
 
     def wiki(self):
@@ -2097,17 +2350,21 @@ class Entities:
                  *eargs, **ekwargs):
         self._entities = {}
         self._order = []
+        self._names = []    # Lowercase names, same order as _order
+        self._by_name = {}  # Lowercase name => list of entities
         self.path = path or (_ref and _ref.path)
         self.ss   = ss   or (_ref and _ref.ss)
 
         if data is not None:
-            for idx, edata in enumerate(data, 1):
-                entity = self.EntityCls(data=edata, idx=idx, ss=self.ss,
-                                        *eargs, **ekwargs)
-                self.add(entity, check=False)
+            self._extend([self.EntityCls(data=edata, idx=idx, ss=self.ss,
+                                         *eargs, **ekwargs)
+                          for idx, edata in enumerate(data, 1)])
         if entities is not None:
-            for entity in entities:
-                self.add(entity, check=TEST_INTEGRITY)
+            if TEST_INTEGRITY:
+                for entity in entities:
+                    self.add(entity)
+            else:
+                self._extend(entities)
 
 
     def filter(self, attr, value):
@@ -2146,12 +2403,12 @@ class Entities:
         """
         if not name:
             return self
+        name = name.lower()
         if partial:
-            def search(x, s): return x.lower() in s.lower()
+            entities = (_e for _e, _n in zip(self._order, self._names) if name in _n)
         else:
-            def search(x, s): return x.lower() == s.lower()
-        # An idea: elif regex: def search(x, s): return re.search(x, s, re.IGNORECASE)
-        entities = (_ for _ in self if search(name, _.name))
+            entities = self._by_name.get(name, ())
+        # An idea: elif regex: re.search(name, _n, re.IGNORECASE)
         return self.__class__(_ref=self, entities=entities)
 
 
@@ -2161,7 +2418,8 @@ class Entities:
             entity or empty if none was found.
             Unlike .find(), a falsy ID will also return an empty container.
         """
-        return self.__class__(_ref=self, entities=(_ for _ in self if _.id == eid))
+        entity = self._entities.get(eid)
+        return self.__class__(_ref=self, entities=() if entity is None else (entity,))
 
 
     def wikitable(self):
@@ -2172,13 +2430,13 @@ class Entities:
             '! Icon\n'
             '! Description\n'
         )
-        table += "".join((_.wikirow() for _ in self))
+        table += "".join([_.wikirow() for _ in self])
         table += '|-\n|}'
         return table
 
 
     def wikipage(self):
-        return "\n\n\n".join(_.wikipage().strip() for _ in self)
+        return "\n\n\n".join([_.wikipage().strip() for _ in self])
 
 
     def dump(self):
@@ -2186,15 +2444,15 @@ class Entities:
 
 
     def to_json(self):
-        return "[\n{}\n]".format(',\n'.join(_.to_json() for _ in self))
+        return "[\n{}\n]".format(',\n'.join([_.to_json() for _ in self]))
 
 
     def pretty(self):
-        return "\n\n".join((_.pretty().strip() for _ in self))
+        return "\n\n".join([_.pretty().strip() for _ in self])
 
 
     def bare(self):
-        return "\n".join(_.bare() for _ in self)
+        return "\n".join([_.bare() for _ in self])
 
 
     def get(self, eid, default=None):
@@ -2213,8 +2471,19 @@ class Entities:
                                      self.__class__.__name__,
                                      type(entity),
                                      repr(entity)))
-        self._entities[entity.id] = entity
-        self._order.append(entity)
+        self._extend((entity,))
+
+
+    def _extend(self, entities):
+        """Add many entities at once, with no type checks. For internal use"""
+        byid, order, names, byname = (self._entities, self._order,
+                                      self._names, self._by_name)
+        for entity in entities:
+            byid[entity.id] = entity
+            order.append(entity)
+            name = entity.name.lower()
+            names.append(name)
+            byname.setdefault(name, []).append(entity)
 
 
     def __getitem__(self, val):
@@ -2254,9 +2523,9 @@ class Qualities(Entities):
         else:
             func = 'pretty'
 
-        return "\n\n\n\n".join(
+        return "\n\n\n\n".join([
             "\n\n".join((indent(getattr(_, func)(),0), indent(_.usage())))
-            for _ in self)
+            for _ in self])
 
 
 
@@ -2286,7 +2555,7 @@ class Events(Entities):
 
 
     def wiki_linkicons(self):
-        return "\n\n---\n\n".join("\n\n".join(_.wiki_linkicons()) for _ in self)
+        return "\n\n---\n\n".join(["\n\n".join(_.wiki_linkicons()) for _ in self])
 
 
 
@@ -2312,6 +2581,13 @@ class SaveQuality:
         "Id": 0
     }
 
+    __slots__ = ('_data', 'save', 'idx', 'quality', 'modifier', 'equipped')
+
+    _wikipage_fmt = compile_format(
+        "=={name}==\n"
+        "* <nowiki>{repr}</nowiki>\n"
+        "* {wiki}\n")
+
     # noinspection PyUnusedLocal
     def __init__(self, data, save, idx=0, ss=None):
         # ss is ignored, save.ss used instead, argument is to satisfy Entities
@@ -2343,14 +2619,15 @@ class SaveQuality:
         # But fix requires all code using .equipped to be (potentially) adapted
         # as SaveQuality is NOT a Quality.
         self.equipped = None
-        qid = (self._data['EquippedPossession'] or {}).get('AssociatedQualityId', 0)
+        equipped = self._data['EquippedPossession']
+        qid = equipped.get('AssociatedQualityId', 0) if equipped else 0
         if qid and self.save.ss:
             self.equipped = self.save.ss.qualities.get(qid)
 
             if not self.equipped:
                 # Create a dummy one
                 self.equipped = Quality(data={'Id': qid, 'Name':''},
-                                        ss=self.ss)
+                                        ss=self.save.ss)
                 log.warning("Could not find Quality equipped to %s slot: %d",
                             self.name, qid)
 
@@ -2402,10 +2679,7 @@ class SaveQuality:
     def in_cargo(self):
         if not self.quality.is_cargo or not self.save or not self.value:
             return False
-        for quality in self.save.qualities:
-            if quality.equipped == self.quality:
-                return False
-        return True
+        return self.quality not in self.save.equipped
 
     @property
     def pyramid_limit(self):
@@ -2514,34 +2788,24 @@ class SaveQuality:
         return self.name or str(self.id)
 
     def wikirow(self):
-        return format_obj(
-            "|-\n"
-            "| {idx}\n"
-            "| {id}\n"
-            "| [[{name_wiki}]]\n"
-            "| {{{{game icon|{image}}}}}\n"
-            "| {description_wiki}\n",
-            self.quality, idx=self.idx)
+        return format_compiled(Entity._wikirow_fmt, self.quality, idx=self.idx)
 
     def wikipage(self):
-        return format_obj(
-            "=={name}==\n"
-            "* <nowiki>{repr}</nowiki>\n"
-            "* {wiki}\n",
-            self, name=self.name, wiki=self.wiki(), repr=repr(self))
+        return format_compiled(self._wikipage_fmt, self, wiki=self.wiki())
 
 
     def __str__(self):
         capstr = iif(self.quality.cap, "/{}".format(self.quality.cap))
         xpstr = iif(self.quality.usepyramidnumbers, " ({} more to increase)".format(
             self.pyramid_limit - self.xp + 1))
-        statusstr = iif(self.status, " [{}]".format(self.status))
+        status = self.status
+        statusstr = iif(status, " [{}]".format(status))
         modstr = iif(self.modifier, " + {} = {}".format(self.modifier,
                                                         self.value + self.modifier))
         equipstr = iif(self.quality.isslot, " [{}]".format(self.equipped or ""))
 
-        return ("{self.id}\t{self.name} = {self.value}{capstr}{xpstr}"
-                "{statusstr}{modstr}{equipstr}".format(**locals()))
+        return "{}\t{} = {}{}{}{}{}{}".format(self.id, self.name, self.value, capstr,
+                                             xpstr, statusstr, modstr, equipstr)
 
 
     def __repr__(self):
@@ -2569,7 +2833,7 @@ class SaveQualities(Entities):
 
 
     def pretty(self):
-        return "\n".join((_.pretty().strip() for _ in self))
+        return "\n".join([_.pretty().strip() for _ in self])
 
 
     def fetch(self, query, partial=False, add=False):
@@ -2596,6 +2860,9 @@ class Save:
         self.path  = path
         self.ss    = ss
 
+        # Qualities equipped in slots, built on first use
+        self._equipped = None
+
         self.qualities = SaveQualities(
            data=self._data['QualitiesPossessedList'],
            ss=self.ss,
@@ -2603,9 +2870,18 @@ class Save:
         )
 
 
+    @property
+    def equipped(self):
+        if self._equipped is None:
+            self._equipped = {_.equipped for _ in self.qualities if _.equipped}
+        return self._equipped
+
     @property
     def cargo(self):
-        return sum(_.value if _.in_cargo else 0 for _ in self.qualities)
+        # Same as summing the in_cargo ones
+        equipped = self.equipped
+        return sum(_.value for _ in self.qualities
+                   if _.quality.is_cargo and _.quality not in equipped)
 
     @property
     def hold(self):
@@ -2625,6 +2901,7 @@ class Save:
         )
         self._data['QualitiesPossessedList'].append(quality.dump())
         self.qualities.add(quality)
+        self._equipped = None
         log.debug("Created new Quality in Save: %r", quality)
         return quality
 
@@ -2648,39 +2925,62 @@ class SunlessSea:
         and call each entity container's constructor
     """
 
+    # Required fields of a placeholder Event, for references to missing ones.
+    # Immutable, so the same empty containers can be shared by all dummies
+    _DUMMY_EVENT = dict(ChildBranches=(), QualitiesRequired=(), QualitiesAffected=())
+
 
     def __init__(self, datadir=None):
         self.datadir = datadir or get_datadir()
-        self.qualities = Qualities(ss=self, **self._load('qualities'))
-        self.locations = Locations(ss=self, **self._load('areas'))
-        self.events    = Events(   ss=self, **self._load('events'))
-        self.autosave  = Save(     ss=self, **self._load('Autosave', 'saves',
-                                                         '', ordered=True))
+
+        # Read all data files at once, so disk reads overlap. Parsing holds
+        # the GIL, and entities are still created in order, one at a time
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            load = functools.partial(executor.submit, self._load)
+            qualities = load('qualities')
+            areas     = load('areas')
+            events    = load('events')
+            autosave  = load('Autosave', 'saves', '', cache=False)
+            tiles     = load('Tiles', subdir='geography')
+            exchanges = load('exchanges')
+
+        self.qualities = Qualities(ss=self, **qualities.result())
+        self.locations = Locations(ss=self, **areas.result())
+        self.events    = Events(   ss=self, **events.result())
+        self.autosave  = Save(     ss=self, **autosave.result())
 
         # Not yet a first-class citizen
-        self.settings = self._create_settings()
+        self.settings = self._create_settings(tiles.result()['data'])
 
         # First class, requires self.settings, constructor still messy
-        self.shops = Shops(entities=(_ for _ in self._create_shop()), ss=self)
+        self.shops = Shops(entities=self._create_shop(exchanges.result()['data']),
+                           ss=self)
         self.ports = None  # soon!
 
+        # Quality ID => usages in events and shops, built on first use
+        self._quality_index = None
+
+        # Entities.get() is already a dict lookup, just skip the attribute
+        # lookups for each item in the loops below
+        get_event, get_quality = self.events.get, self.qualities.get
+        effect_cls = Effect
+
         # Add references to other Qualities in 'Enhancements' and 'AssignToSlot',
         # and to Events in UseEvent
         for quality in self.qualities:
             # Enhancements
-            quality.enhancements = [
-                Effect(data=_d, idx=_i, ss=self, parent=quality)
-                for _i, _d in enumerate(quality.enhancements, 1)
-            ]
+            enhancements = quality.enhancements
+            if enhancements:
+                quality.enhancements = [
+                    effect_cls(data=_d, idx=_i, ss=self, parent=quality)
+                    for _i, _d in enumerate(enhancements, 1)
+                ]
 
             # UseEvent
             if quality.event:
-                event = self.events.get(quality.event)
+                event = get_event(quality.event)
                 if not event:
-                    # Create a dummy one
-                    event = Event(ss=self, data=dict(Id=quality.event,
-                                                     ChildBranches=[],
-                                                     QualitiesRequired=[]))
+                    event = self._dummy_event(quality.event)
                     log.error("%r uses non-existing event: %r", quality, event)
                 quality.event = event
 
@@ -2689,7 +2989,7 @@ class SunlessSea:
             if slot is None:
                 continue
 
-            quality.assign = self.qualities.get(slot)
+            quality.assign = get_quality(slot)
             if quality.assign is not None:
                 continue
 
@@ -2699,78 +2999,135 @@ class SunlessSea:
                       quality, slot)
 
         # Add 'LinkToEvent' references
-        for event in self.events:
-            for action in event.actions:
-                for outcome in action.outcomes:
-                    trigger = outcome.trigger
-                    if trigger is None:
-                        continue
-
-                    outcome.trigger = self.events.get(trigger)
-                    if outcome.trigger is not None:
-                        continue
-
-                    # Create a dummy one
-                    outcome.trigger = Event(ss=self,
-                                            data=dict(Id=trigger,
-                                                      ChildBranches=[],
-                                                      QualitiesRequired=[]))
-                    log.error("%r.%r.%r links to a non-existant event: %d",
-                              event, action, outcome, trigger)
+        for outcome in itertools.chain.from_iterable(
+            _a.outcomes for _e in self.events for _a in _e.actions
+        ):
+            trigger = outcome.trigger
+            if trigger is None:
+                continue
+
+            outcome.trigger = get_event(trigger)
+            if outcome.trigger is not None:
+                continue
+
+            outcome.trigger = self._dummy_event(trigger)
+            action = outcome.parent
+            log.error("%r.%r.%r links to a non-existant event: %d",
+                      action.parent, action, outcome, trigger)
 
         if TEST_INTEGRITY:
-            for item in self.autosave.qualities:
-                if item.equipped and item.equipped.assign is not item.quality:
-                    log.error("Autosave slot %r has %r equipped, but that is"
-                              " assignable to slot %r",
-                              item, item.equipped, item.equipped.assign)
+            self._test_integrity()
+
+
+    def _test_integrity(self):
+        for item in self.autosave.qualities:
+            if item.equipped and item.equipped.assign is not item.quality:
+                log.error("Autosave slot %r has %r equipped, but that is"
+                          " assignable to slot %r",
+                          item, item.equipped, item.equipped.assign)
+
+
+    @functools.cached_property
+    def echo(self):
+        """The Echo quality, main currency in trades"""
+        return self.qualities.fetch('Echo')
+
+
+    def quality_usage(self, qid):
+        """Return all usages of a quality ID in events and shops.
+
+        Each usage is a (entity, kind, action, outcome, item) tuple, kind being
+        one of 'req', 'eff', 'act_req', 'act_out' or 'shop'. The reverse index
+        is built on first call, so further lookups for any quality are cheap.
+        """
+        if self._quality_index is None:
+            self._quality_index = self._create_quality_index()
+        return self._quality_index.get(qid, ())
+
+
+    def _create_quality_index(self):
+        # A single sweep fills the usages of all qualities at once.
+        # defaultdict does not create a throwaway list per usage as
+        # setdefault() does, and the local bind saves a lookup per usage
+        index = collections.defaultdict(list)
+        usages = index.__getitem__
+
+        # Only the first Requirement or Effect for each quality is listed,
+        # and an Outcome is listed once, even if it has many effects on it
+        for e in self.events:
+            for qid, r in e._req_by_qid.items():
+                usages(qid).append((e, 'req', None, None, r[0]))
+            for qid, f in e._eff_by_qid.items():
+                usages(qid).append((e, 'eff', None, None, f[0]))
+            for a in e.actions:
+                for qid, r in a._req_by_qid.items():
+                    usages(qid).append((e, 'act_req', a, None, r[0]))
+                for o in a.outcomes:
+                    for qid in o._eff_by_qid:
+                        usages(qid).append((e, 'act_out', a, o, None))
+
+        for s in self.shops:
+            for i in s.items:
+                item, currency = i.item.id, i.currency.id
+                usages(item).append((s, 'shop', None, None, i))
+                if currency != item:
+                    usages(currency).append((s, 'shop', None, None, i))
+
+        return dict(index)  # Plain dict, so a stray index[qid] can't add keys
+
 
+    def _dummy_event(self, eid):
+        return Event(ss=self, data=dict(self._DUMMY_EVENT, Id=eid))
 
-    def _create_shop(self):
-        i = 0  # lame
-        exchanges = self._load('exchanges')['data']
+
+    def _create_shop(self, exchanges):
+        settings = self.settings
+        shops = []
+        pool = {}  # Setting IDs => locations, shared by exchanges in same places
         for exchange in exchanges:
-            locations = set(_l
-                            for _ in exchange['SettingIds'] if _ in self.settings
-                            for _l in self.settings[_]['locations'])
+            sids = frozenset(_ for _ in exchange['SettingIds'] if _ in settings)
+            locations = pool.get(sids)
+            if locations is None:
+                locations = pool[sids] = frozenset(
+                    _l for _ in sids for _l in settings[_]['locations'])
 
-            for shop in exchange['Shops']:
-                i += 1
-                yield Shop(data=shop, idx=i, ss=self, locations=locations)
+            # Shop index is global, not per exchange
+            shops.extend(Shop(data=shop, idx=i, ss=self, locations=locations)
+                         for i, shop in enumerate(exchange['Shops'],
+                                                  len(shops) + 1))
+        return shops
 
 
-    def _create_settings(self):
+    def _create_settings(self, tiles):
         # Deal with the tiles, settings, areas, locations and ports mess
         settings = {}
         areas = {}  # Integrity check only
-        tiles = self._load('Tiles', subdir='geography')['data']
-        for item, aid, sid in (
-            (
-                (_['Name'], _t['Name'], _p['Name']),
-                _p['Area']['Id'],
-                _p['Setting']['Id']
-            )
-            for _ in tiles
-            for _t in _['Tiles']
-            for _p in _t['PortData']
-        ):
-            if TEST_INTEGRITY:
-                if not areas.get(aid, sid) == sid:
-                    log.error("Area %s is not 1:1 with Settings: %s, %s",
-                              aid, areas[aid], sid)
-                areas[aid] = sid
-
-            location = self.locations.get(aid, None)
-            if location:
-                location.setting = sid
-            else:
-                # Dummy
-                location = Location(data={'Id': aid}, ss=self)
-                log.error("Location not found for port (%s): %s",
-                          ", ".join(item), aid)
-
-            settings.setdefault(
-                sid, {'locations': set()})['locations'].add(location)
+        get_location, test_integrity = self.locations.get, TEST_INTEGRITY
+        for group in tiles:
+            for tile in group['Tiles']:
+                for port in tile['PortData']:
+                    aid = port['Area']['Id']
+                    sid = port['Setting']['Id']
+
+                    if test_integrity:
+                        if not areas.get(aid, sid) == sid:
+                            log.error("Area %s is not 1:1 with Settings: %s, %s",
+                                      aid, areas[aid], sid)
+                        areas[aid] = sid
+
+                    location = get_location(aid, None)
+                    if location:
+                        location.setting = sid
+                    else:
+                        # Dummy
+                        location = Location(data={'Id': aid}, ss=self)
+                        log.error("Location not found for port (%s, %s, %s): %s",
+                                  group['Name'], tile['Name'], port['Name'], aid)
+
+                    setting = settings.get(sid)
+                    if setting is None:
+                        setting = settings[sid] = {'locations': set()}
+                    setting['locations'].add(location)
 
         # Requires check AND debug flags... can't possibly hide this better :)
         if TEST_INTEGRITY:
@@ -2782,21 +3139,80 @@ class SunlessSea:
         return settings
 
 
-    def _load(self, entity, subdir='entities', suffix="_import", ordered=False):
+    def _load(self, entity, subdir='entities', suffix="_import", cache=True):
         path = os.path.join(self.datadir,
                             subdir,
                             "{}{}.json".format(entity, suffix))
+        # Only static data files are cached or memory-mapped, never the
+        # Autosave, as the game may rewrite it at any time
+        static, cache = cache, CACHE_DATA and cache
+        if cache:
+            data = self._load_cache(path)
+            if data is not None:
+                log.debug("Using cached data for '%-9s': %s", entity, path)
+                return dict(path=path, data=data)
+
         log.debug("Opening data file for '%-9s': %s", entity, path)
         try:
-            with open(path) as fd:
-                # strict=False to allow tabs inside strings
-                return dict(path=path, data=json.load(fd, strict=False,
-                        object_pairs_hook=(collections.OrderedDict
-                                           if ordered else None)))
+            data = self._parse(entity, path, mapped=static)
         except IOError as e:
             log.error("Could not load data file for '%s': %s", entity, e)
             return dict(path=path, data={})
 
+        if cache:
+            self._save_cache(path, data)
+        return dict(path=path, data=data)
+
+
+    @staticmethod
+    def _parse(entity, path, mapped=True):
+        if orjson:
+            try:
+                if mapped:
+                    # Parse straight from the page cache, no intermediate copy
+                    with open(path, 'rb') as fd, \
+                         mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                         memoryview(mm) as buf:
+                        return orjson.loads(buf)
+                # A file truncated while mapped would crash with SIGBUS
+                with open(path, 'rb') as fd:
+                    return orjson.loads(fd.read())
+            except orjson.JSONDecodeError as e:
+                # Most likely tabs inside strings, see below
+                log.debug("Falling back to json for '%s': %s", entity, e)
+        with open(path) as fd:
+            # strict=False to allow tabs inside strings. Key order, relevant
+            # when writing back the Autosave, is kept by plain dicts
+            return json.load(fd, strict=False)
+
+
+    @staticmethod
+    def _load_cache(path):
+        """Return the data pickled by _save_cache(), or None if stale or missing"""
+        cache = path + '.pkl'
+        try:
+            if os.path.getmtime(cache) < os.path.getmtime(path):
+                return None
+            with open(cache, 'rb') as fd:
+                return pickle.load(fd)
+        except FileNotFoundError:
+            return None
+        except (IOError, EOFError, pickle.UnpicklingError) as e:
+            log.debug("Could not load cache %s: %s", cache, e)
+            return None
+
+
+    @staticmethod
+    def _save_cache(path, data):
+        cache = path + '.pkl'
+        try:
+            # Write-then-rename, so an interrupted dump never leaves a bad cache
+            with open(cache + '.tmp', 'wb') as fd:
+                pickle.dump(data, fd, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(cache + '.tmp', cache)
+        except IOError as e:
+            log.warning("Could not save cache %s: %s", cache, e)
+
 
 ################################################################################
 # Import guard